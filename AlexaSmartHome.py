@@ -1,11 +1,10 @@
 import logging
-import sys, operator
+import sys, os
 
-from uuid import uuid4
 from datetime import datetime
 from typing import Tuple
 
-import math, colorsys
+import math
 import traceback 
 from typing import Callable, TypeVar
 
@@ -24,13 +23,22 @@ class Registry(dict):
 
 INTERFACES = Registry()
 
+class UnknownEndpointError(KeyError):
+    """Raised by a handler's getEndpoint for an endpointId it cannot serve."""
+
 class AlexaInterface:
+    __slots__ = ('_endpoint', '_properties', '_proactivelyReported',
+                 '_retrievable', '_modesSupported', '_deactivationSupported')
+
+    # Interface name and version are fixed per class
+    _name = 'Alexa'
+    _version = "3"
 
     # UPDATED: Set proactivelyReported to True by default to enable state updates in Alexa app.
-    def __init__(self, endpoint, name = 'Alexa', properties = [], proactivelyReported = True, retrievable = True, modesSupported = None, deactivationSupported = None):
+    # Options are keyword-only, so calls still passing the old positional name fail loudly.
+    def __init__(self, endpoint, *, properties = None, proactivelyReported = True, retrievable = True, modesSupported = None, deactivationSupported = None):
         self._endpoint = endpoint
-        self._name = name
-        self._properties = properties
+        self._properties = properties or []
         self._proactivelyReported = proactivelyReported
         self._retrievable = retrievable
         self._modesSupported = modesSupported
@@ -40,7 +48,7 @@ class AlexaInterface:
         return self._name
 
     def version(self):
-        return "3"
+        return self._version
 
     def propertiesSupported(self):
         return self._properties
@@ -65,46 +73,54 @@ class AlexaInterface:
 
     def setModesSupported(self, modesSupported):
         self._modesSupported = modesSupported
+        # The modes are part of the discovery configuration
+        self._endpoint._discoveryCache = None
 
     def serializeDiscovery(self):
         result = {
             'type': 'AlexaInterface',
-            'interface': self.name(),
-            'version': self.version(),
+            'interface': self._name,
+            'version': self._version,
         }
         props = self.propertiesSupported()
         if props:
             result['properties'] = {
                 'supported': props,
-                'proactivelyReported': self.propertiesProactivelyReported(),
-                'retrievable': self.propertiesRetrievable(),
+                'proactivelyReported': self._proactivelyReported,
+                'retrievable': self._retrievable,
             }
-        if self.configuration() is not None:
-            result['configuration'] = self.configuration()
+        configuration = self.configuration()
+        if configuration is not None:
+            result['configuration'] = configuration
         return result
 
-    def serializeProperties(self):
+    def serializeProperties(self, timeOfSample, device=None):
         for prop in self.propertiesSupported():
             prop_name = prop['name']
-            prop_value = self._endpoint.getProperty(prop_name)
+            prop_value = self._endpoint.getProperty(prop_name, device)
             if prop_value is not None:
                 yield {
                     'name': prop_name,
-                    'namespace': self.name(),
+                    'namespace': self._name,
                     'value': prop_value,
-                    'timeOfSample': datetime.utcnow().replace(microsecond=0).isoformat()+"Z",
+                    'timeOfSample': timeOfSample,
                     'uncertaintyInMilliseconds': 0,
                 }
 
 class AlexaEndpoint(object):
+    __slots__ = ('_endpointId', '_friendlyName', '_description', '_manufacturerName',
+                 '_capabilities', '_displayCategories', '_cookies', '_discoveryCache')
+
     def __init__(self, endpointId, friendlyName="", description="", manufacturerName=""):
         self._endpointId = endpointId
         self._friendlyName = friendlyName
         self._description = description
         self._manufacturerName = manufacturerName
         self._capabilities = [AlexaInterface(self)]
-        self._displayCategories = []
-        self._cookies = {}
+        # Allocated on first use, most endpoints have neither
+        self._displayCategories = None
+        self._cookies = None
+        self._discoveryCache = None
 
     def endpointId(self):
         return self._endpointId
@@ -119,121 +135,132 @@ class AlexaEndpoint(object):
         return self._manufacturerName
 
     def displayCategories(self):
-        return self._displayCategories
+        return self._displayCategories or []
 
     def capabilities(self):
         return self._capabilities
 
     def cookies(self):
-        return self._cookies
+        return self._cookies or {}
 
-    def getProperty(self, name):
+    def getProperty(self, name, device=None):
         return None
 
+    def serializedCapabilities(self):
+        """Return the discovery form of the capabilities, built once."""
+        if self._discoveryCache is None:
+            self._discoveryCache = [i.serializeDiscovery() for i in self._capabilities]
+        return self._discoveryCache
+
     def addDisplayCategories(self, category):
+        if self._displayCategories is None:
+            self._displayCategories = []
         self._displayCategories.append(category)
 
     def addCapability(self, interface):
         self._capabilities.append(interface)
+        self._discoveryCache = None
 
     def addCookie(self, dict):
+        if self._cookies is None:
+            self._cookies = {}
         for k, v in dict.items():
             self._cookies[k] = v
 
 @INTERFACES.register('Alexa.PowerController')
 class AlexaPowerController(AlexaInterface):
-    def name(self):
-        return 'Alexa.PowerController'
+    __slots__ = ()
+    _name = 'Alexa.PowerController'
 
     def propertiesSupported(self):
         return [{'name': 'powerState'}]
 
 @INTERFACES.register('Alexa.LockController')
 class AlexaLockController(AlexaInterface):
-    def name(self):
-        return 'Alexa.LockController'
+    __slots__ = ()
+    _name = 'Alexa.LockController'
 
     def propertiesSupported(self):
         return [{'name': 'lockState'}]
 
 @INTERFACES.register('Alexa.SceneController')
 class AlexaSceneController(AlexaInterface):
-    def name(self):
-        return 'Alexa.SceneController'
+    __slots__ = ()
+    _name = 'Alexa.SceneController'
 
     def serializeDiscovery(self):
         result = {
             'type': 'AlexaInterface',
-            'interface': self.name(),
-            'version': self.version(),
-            'supportsDeactivation': self.supportsDeactivation(),
+            'interface': self._name,
+            'version': self._version,
+            'supportsDeactivation': self._deactivationSupported,
         }
         return result
 
 @INTERFACES.register('Alexa.BrightnessController')
 class AlexaBrightnessController(AlexaInterface):
-    def name(self):
-        return 'Alexa.BrightnessController'
+    __slots__ = ()
+    _name = 'Alexa.BrightnessController'
 
     def propertiesSupported(self):
         return [{'name': 'brightness'}]
 
 @INTERFACES.register('Alexa.ColorController')
 class AlexaColorController(AlexaInterface):
-    def name(self):
-        return 'Alexa.ColorController'
+    __slots__ = ()
+    _name = 'Alexa.ColorController'
 
     def propertiesSupported(self):
         return [{'name': 'color'}]
 
 @INTERFACES.register('Alexa.ColorTemperatureController')
 class AlexaColorTemperatureController(AlexaInterface):
-    def name(self):
-        return 'Alexa.ColorTemperatureController'
+    __slots__ = ()
+    _name = 'Alexa.ColorTemperatureController'
 
     def propertiesSupported(self):
         return [{'name': 'colorTemperatureInKelvin'}]
 
 @INTERFACES.register('Alexa.PercentageController')
 class AlexaPercentageController(AlexaInterface):
-    def name(self):
-        return 'Alexa.PercentageController'
+    __slots__ = ()
+    _name = 'Alexa.PercentageController'
 
     def propertiesSupported(self):
         return [{'name': 'percentage'}]
 
 @INTERFACES.register('Alexa.Speaker')
 class AlexaSpeaker(AlexaInterface):
-    def name(self):
-        return 'Alexa.Speaker'
+    __slots__ = ()
+    _name = 'Alexa.Speaker'
 
 @INTERFACES.register('Alexa.StepSpeaker')
 class AlexaStepSpeaker(AlexaInterface):
-    def name(self):
-        return 'Alexa.StepSpeaker'
+    __slots__ = ()
+    _name = 'Alexa.StepSpeaker'
 
 @INTERFACES.register('Alexa.PlaybackController')
 class AlexaPlaybackController(AlexaInterface):
-    def name(self):
-        return 'Alexa.PlaybackController'
+    __slots__ = ()
+    _name = 'Alexa.PlaybackController'
 
 @INTERFACES.register('Alexa.InputController')
 class AlexaInputController(AlexaInterface):
-    def name(self):
-        return 'Alexa.InputController'
+    __slots__ = ()
+    _name = 'Alexa.InputController'
 
 @INTERFACES.register('Alexa.TemperatureSensor')
 class AlexaTemperatureSensor(AlexaInterface):
-    def name(self):
-        return 'Alexa.TemperatureSensor'
+    __slots__ = ()
+    _name = 'Alexa.TemperatureSensor'
 
     def propertiesSupported(self):
         return [{'name': 'temperature'}]
 
 @INTERFACES.register('Alexa.ThermostatController')
 class AlexaThermostatController(AlexaInterface):
-    def name(self):
-        return 'Alexa.ThermostatController'
+    __slots__ = ()
+    _name = 'Alexa.ThermostatController'
 
     def propertiesSupported(self):
         return [{'name': 'targetSetpoint'}, {'name': 'thermostatMode'}]
@@ -249,8 +276,8 @@ class AlexaThermostatController(AlexaInterface):
 
 @INTERFACES.register('Alexa.ContactSensor')
 class AlexaContactSensor(AlexaInterface):
-    def name(self):
-        return 'Alexa.ContactSensor'
+    __slots__ = ()
+    _name = 'Alexa.ContactSensor'
 
     def propertiesSupported(self):
         return [{'name': 'detectionState'}]
@@ -264,6 +291,9 @@ API_PAYLOAD = 'payload'
 
 _LOGGER = logging.getLogger(__name__)
 
+# Response header shape, copied and filled in by api_message
+_BASE_HEADER = {'namespace': '', 'name': '', 'messageId': '', 'payloadVersion': '3'}
+
 def api_message(request,
                 name='Response',
                 namespace='Alexa',
@@ -271,29 +301,23 @@ def api_message(request,
                 context=None):
     """Create a API formatted response message.
     """
-    payload = payload or {}
-
-    response = {
-        API_EVENT: {
-            API_HEADER: {
-                'namespace': namespace,
-                'name': name,
-                'messageId': str(uuid4()),
-                'payloadVersion': '3',
-            },
-            API_PAYLOAD: payload,
-        }
-    }
+    header = _BASE_HEADER.copy()
+    header['namespace'] = namespace
+    header['name'] = name
+    header['messageId'] = os.urandom(16).hex()
 
     # If a correlation token exists, add it to header / Need by Async requests
     token = request[API_HEADER].get('correlationToken')
     if token:
-        response[API_EVENT][API_HEADER]['correlationToken'] = token
+        header['correlationToken'] = token
+
+    event = {API_HEADER: header, API_PAYLOAD: payload or {}}
 
     # Extend event with endpoint object / Need by Async requests
     if API_ENDPOINT in request:
-        response[API_EVENT][API_ENDPOINT] = request[API_ENDPOINT].copy()
+        event[API_ENDPOINT] = request[API_ENDPOINT].copy()
 
+    response = {API_EVENT: event}
     if context is not None:
         response[API_CONTEXT] = context
 
@@ -329,42 +353,62 @@ def handle_message(handler, message):
 
     return invoke(namespace, name, handler, message)
 
+def utc_timestamp():
+    """Return the current UTC time as an Alexa ISO 8601 string."""
+    return datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
+
 class AlexaSmartHomeCall(object):
     def __init__(self, namespace, name, handler):
         self.namespace = namespace
         self.name = name
         self.handler = handler
+        # One sample time per directive, shared by every reported property
+        self.timeOfSample = utc_timestamp()
+
+    def debugRequest(self, details="", *args):
+        """Log the directive at DEBUG level, skipped entirely otherwise."""
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Request %s/%s" + details, self.namespace, self.name, *args)
+
+    def stateResponse(self, request, namespace, name, value):
+        """Respond to a directive with the single property it changed."""
+        prop = {
+            'name': name,
+            'namespace': namespace,
+            'value': value,
+            'timeOfSample': self.timeOfSample,
+            'uncertaintyInMilliseconds': 0,
+        }
+        return api_message(request, context={'properties': [prop]})
 
-    def invoke(self, name, request):
+    def invoke(self, method, request):
         try:
-            return operator.attrgetter(name)(self)(request)
+            return getattr(self, method)(request)
+        except UnknownEndpointError as e:
+            return api_error(request, error_type='NO_SUCH_ENDPOINT', error_message=f"Unknown endpoint {e.args[0]}")
         except Exception:
             _LOGGER.exception("Error during Alexa skill invocation for %s/%s", self.namespace, self.name)
             return api_error(request, error_type='INTERNAL_ERROR', error_message="An unexpected error occurred while processing your request.")
+
+# Discovery endpoint fields, in the order Discover fills them
+_DISCOVERY_KEYS = ('endpointId', 'friendlyName', 'description', 'manufacturerName',
+                   'displayCategories', 'capabilities')
+
 class Alexa(object):
 
     class Discovery(AlexaSmartHomeCall):
 
         def Discover(self, request):
-            discovery_endpoints = []
-            endpoints = self.handler.getEndpoints()
-            for endpoint in endpoints:
-                discovery_endpoint = {
-                    'endpointId': endpoint.endpointId(),
-                    'friendlyName': endpoint.friendlyName(),
-                    'description': endpoint.description(),
-                    'manufacturerName': endpoint.manufacturerName(),
-                    'displayCategories': endpoint.displayCategories(),
-                    'additionalApplianceDetails': {},
-                }
-                discovery_endpoint['capabilities'] = [
-                    i.serializeDiscovery() for i in endpoint.capabilities()]
-                if not discovery_endpoint['capabilities']:
-                    _LOGGER.debug("Not exposing %s because it has no capabilities", endpoint.endpointId())
-                    continue
-                discovery_endpoints.append(discovery_endpoint)
+            # Endpoints without capabilities are not exposed
+            endpoints = [e for e in self.handler.getEndpoints() if e._capabilities]
+            discovery_endpoints = [
+                dict(zip(_DISCOVERY_KEYS, (
+                    e._endpointId, e._friendlyName, e._description, e._manufacturerName,
+                    e.displayCategories(), e.serializedCapabilities())),
+                    additionalApplianceDetails={})
+                for e in endpoints]
 
-            _LOGGER.debug("Request %s/%s", request[API_HEADER]['namespace'], request[API_HEADER]['name'])
+            self.debugRequest()
 
             return api_message(
                 request, name='Discover.Response', namespace='Alexa.Discovery',
@@ -373,61 +417,36 @@ class Alexa(object):
     class PowerController(AlexaSmartHomeCall):
 
         def TurnOn(self, request):
-            _LOGGER.debug("Request %s/%s", request[API_HEADER]['namespace'], request[API_HEADER]['name'])
+            self.debugRequest()
             endpoint = self.handler.getEndpoint(request)
             endpoint.turnOn()
             
             # FIX: Return new state in context to prevent "No Response" error
-            properties = [{
-                'name': 'powerState',
-                'namespace': 'Alexa.PowerController',
-                'value': 'ON',
-                'timeOfSample': datetime.utcnow().replace(microsecond=0).isoformat() + "Z",
-                'uncertaintyInMilliseconds': 0
-            }]
-            return api_message(request, context={'properties': properties})
+            return self.stateResponse(request, 'Alexa.PowerController', 'powerState', 'ON')
 
         def TurnOff(self, request):
-            _LOGGER.debug("Request %s/%s", request[API_HEADER]['namespace'], request[API_HEADER]['name'])
+            self.debugRequest()
             endpoint = self.handler.getEndpoint(request)
             endpoint.turnOff()
             
             # FIX: Return new state in context to prevent "No Response" error
-            properties = [{
-                'name': 'powerState',
-                'namespace': 'Alexa.PowerController',
-                'value': 'OFF',
-                'timeOfSample': datetime.utcnow().replace(microsecond=0).isoformat() + "Z",
-                'uncertaintyInMilliseconds': 0
-            }]
-            return api_message(request, context={'properties': properties})
+            return self.stateResponse(request, 'Alexa.PowerController', 'powerState', 'OFF')
 
     class BrightnessController(AlexaSmartHomeCall):
 
         def setbrightness(self, request, endpoint, brightness):
             endpoint.setBrightness(brightness)
-            properties = [{
-                'name': 'brightness',
-                'namespace': 'Alexa.BrightnessController',
-                "value": brightness,
-                'timeOfSample': datetime.utcnow().replace(microsecond=0).isoformat() + "Z",
-                'uncertaintyInMilliseconds': 0
-            }]
-            return api_message(request, context={'properties': properties})
+            return self.stateResponse(request, 'Alexa.BrightnessController', 'brightness', brightness)
 
         def SetBrightness(self, request):
             brightness = int(request[API_PAYLOAD]['brightness'])
-            _LOGGER.debug("Request %s/%s brightness %d", 
-                   request[API_HEADER]['namespace'], request[API_HEADER]['name'],
-                   brightness)
+            self.debugRequest(" brightness %d", brightness)
             endpoint = self.handler.getEndpoint(request)
             return self.setbrightness(request, endpoint, brightness)
 
         def AdjustBrightness(self, request):
             brightness_delta = int(request[API_PAYLOAD]['brightnessDelta'])
-            _LOGGER.debug("Request %s/%s brightness_delta %d", 
-                        request[API_HEADER]['namespace'], request[API_HEADER]['name'],
-                        brightness_delta)
+            self.debugRequest(" brightness_delta %d", brightness_delta)
             endpoint = self.handler.getEndpoint(request)
             # Use optimistic calculation if possible or fetch current
             current_brightness = endpoint.getProperty('brightness') or 50
@@ -440,48 +459,30 @@ class Alexa(object):
             h = float(request[API_PAYLOAD]['color']['hue'])
             s = float(request[API_PAYLOAD]['color']['saturation'])
             b = float(request[API_PAYLOAD]['color']['brightness'])
-            _LOGGER.debug("Request %s/%s", 
-                        request[API_HEADER]['namespace'], request[API_HEADER]['name'])
+            self.debugRequest()
             endpoint = self.handler.getEndpoint(request)
             endpoint.setColor(h,s,b)
             
-            properties = [{
-                'name': 'color',
-                'namespace': 'Alexa.ColorController',
-                'value': request[API_PAYLOAD]['color'],
-                'timeOfSample': datetime.utcnow().replace(microsecond=0).isoformat() + "Z",
-                'uncertaintyInMilliseconds': 0
-            }]
-            return api_message(request, context={'properties': properties})
+            return self.stateResponse(request, 'Alexa.ColorController', 'color', request[API_PAYLOAD]['color'])
 
     class ColorTemperatureController(AlexaSmartHomeCall):
 
         def SetColorTemperature(self, request):
             kelvin = int(request[API_PAYLOAD]['colorTemperatureInKelvin'])
-            _LOGGER.debug("Request %s/%s kelvin %d", 
-                        request[API_HEADER]['namespace'], request[API_HEADER]['name'],
-                        kelvin)
+            self.debugRequest(" kelvin %d", kelvin)
             endpoint = self.handler.getEndpoint(request)
             endpoint.setColorTemperature(kelvin)
             
-            properties = [{
-                'name': 'colorTemperatureInKelvin',
-                'namespace': 'Alexa.ColorTemperatureController',
-                'value': kelvin,
-                'timeOfSample': datetime.utcnow().replace(microsecond=0).isoformat() + "Z",
-                'uncertaintyInMilliseconds': 0
-            }]
-            return api_message(request, context={'properties': properties})
+            return self.stateResponse(request, 'Alexa.ColorTemperatureController', 'colorTemperatureInKelvin', kelvin)
 
     class SceneController(AlexaSmartHomeCall):
 
         def Activate(self, request):
-            timestamp = datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
             payload = {
                 'cause': {'type': 'VOICE_INTERACTION'},
-                'timestamp': timestamp
+                'timestamp': self.timeOfSample
             }
-            _LOGGER.debug("Request %s/%s", request[API_HEADER]['namespace'], request[API_HEADER]['name'])
+            self.debugRequest()
             endpoint = self.handler.getEndpoint(request)
             endpoint.activate()
             return api_message(request,
@@ -489,12 +490,11 @@ class Alexa(object):
                 payload=payload)
 
         def Deactivate(self, request):
-            timestamp = datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
             payload = {
                 'cause': {'type': 'VOICE_INTERACTION'},
-                'timestamp': timestamp
+                'timestamp': self.timeOfSample
             }
-            _LOGGER.debug("Request %s/%s", request[API_HEADER]['namespace'], request[API_HEADER]['name'])
+            self.debugRequest()
             endpoint = self.handler.getEndpoint(request)
             endpoint.deactivate()
             return api_message(request,
@@ -505,22 +505,13 @@ class Alexa(object):
 
         def SetPercentage(self, request):
             percentage = int(request[API_PAYLOAD]['percentage'])
-            _LOGGER.debug("Request %s/%s percentage %d", 
-                        request[API_HEADER]['namespace'], request[API_HEADER]['name'],
-                        percentage)
+            self.debugRequest(" percentage %d", percentage)
             endpoint = self.handler.getEndpoint(request)
             if   (percentage < 0):   percentage = 0
             elif (percentage > 100): percentage = 100
             endpoint.setPercentage(percentage)
             
-            properties = [{
-                'name': 'percentage',
-                'namespace': 'Alexa.PercentageController',
-                'value': percentage,
-                'timeOfSample': datetime.utcnow().replace(microsecond=0).isoformat() + "Z",
-                'uncertaintyInMilliseconds': 0
-            }]
-            return api_message(request, context={'properties': properties})
+            return self.stateResponse(request, 'Alexa.PercentageController', 'percentage', percentage)
 
     class LockController(AlexaSmartHomeCall):
 
@@ -529,29 +520,15 @@ class Alexa(object):
             # Trigger actual lock command if endpoint supports it
             if hasattr(endpoint, 'lock'): endpoint.lock()
             
-            properties = [{
-                'name': 'lockState',
-                'namespace': 'Alexa.LockController',
-                'value': 'LOCKED',
-                'timeOfSample': datetime.utcnow().replace(microsecond=0).isoformat() + "Z",
-                'uncertaintyInMilliseconds': 0
-            }]
-            _LOGGER.debug("Request %s/%s", request[API_HEADER]['namespace'], request[API_HEADER]['name'])
-            return api_message(request, context={'properties': properties})
+            self.debugRequest()
+            return self.stateResponse(request, 'Alexa.LockController', 'lockState', 'LOCKED')
 
         def Unlock(self, request):
             endpoint = self.handler.getEndpoint(request)
             if hasattr(endpoint, 'unlock'): endpoint.unlock()
             
-            properties = [{
-                'name': 'lockState',
-                'namespace': 'Alexa.LockController',
-                'value': 'UNLOCKED',
-                'timeOfSample': datetime.utcnow().replace(microsecond=0).isoformat() + "Z",
-                'uncertaintyInMilliseconds': 0
-            }]
-            _LOGGER.debug("Request %s/%s", request[API_HEADER]['namespace'], request[API_HEADER]['name'])
-            return api_message(request, context={'properties': properties})
+            self.debugRequest()
+            return self.stateResponse(request, 'Alexa.LockController', 'lockState', 'UNLOCKED')
 
     class ThermostatController(AlexaSmartHomeCall):
 
@@ -562,78 +539,78 @@ class Alexa(object):
             
             if 'targetSetpoint' in payload:
                 temp = temperature_from_object(payload['targetSetpoint'])
-                _LOGGER.debug("Request %s/%s targetSetpoint %.2f",
-                            request[API_HEADER]['namespace'], request[API_HEADER]['name'], temp)
+                self.debugRequest(" targetSetpoint %.2f", temp)
                 endpoint.setTargetSetPoint(temp)
 
-            properties = [{
-                'name': 'targetSetpoint',
-                'namespace': 'Alexa.ThermostatController',
-                "value": {
-                    "value": temp,
-                    "scale": tempScale
-                },
-                'timeOfSample': datetime.utcnow().replace(microsecond=0).isoformat() + "Z",
-                'uncertaintyInMilliseconds': 0
-            }]
-            return api_message(request, context={'properties': properties})
+            return self.stateResponse(request, 'Alexa.ThermostatController', 'targetSetpoint', {'value': temp, 'scale': tempScale})
 
         def SetThermostatMode(self, request):
             mode = request[API_PAYLOAD]['thermostatMode']
             mode = mode if isinstance(mode, str) else mode['value']
 
-            _LOGGER.debug("Request %s/%s targetSetpoint mode %s", 
-                        request[API_HEADER]['namespace'], request[API_HEADER]['name'], str(mode))
+            self.debugRequest(" targetSetpoint mode %s", mode)
 
             endpoint = self.handler.getEndpoint(request)
             endpoint.setThermostatMode(mode)
-            properties = [{
-                'name': 'thermostatMode',
-                'namespace': 'Alexa.ThermostatController',
-                "value": mode,
-                'timeOfSample': datetime.utcnow().replace(microsecond=0).isoformat() + "Z",
-                'uncertaintyInMilliseconds': 0
-            }]
-            return api_message(request, context={'properties': properties})
+            return self.stateResponse(request, 'Alexa.ThermostatController', 'thermostatMode', mode)
 
     class ReportState(AlexaSmartHomeCall):
 
         def ReportState(self, request):
             properties = []
             endpoint = self.handler.getEndpoint(request)
-            if not endpoint or endpoint.getDevice() is None:
+            device = endpoint.getDevice() if endpoint else None
+            if device is None:
                 _LOGGER.error("ReportState failed: Could not fetch device state for %s", request['endpoint']['endpointId'])
                 return api_error(request, error_type='ENDPOINT_UNREACHABLE', error_message="Could not connect to Domoticz")
 
+            # Device state is fetched once and shared by every interface
             for interface in endpoint.capabilities():
-                properties.extend(interface.serializeProperties())
+                properties.extend(interface.serializeProperties(self.timeOfSample, device))
 
-            _LOGGER.debug("Request %s/%s properties %s", 
-                        request[API_HEADER]['namespace'], request[API_HEADER]['name'], str(properties))
+            self.debugRequest(" properties %s", properties)
             return api_message(request,
                 name='StateReport',
                 context={'properties': properties})
 
 def invoke(namespace, name, handler, request):
+    entry = DIRECTIVES.get((namespace, name))
+    if entry is None:
+        return api_error(request, error_type='INVALID_DIRECTIVE', error_message=f"Unknown directive {namespace}/{name}")
+
+    cls, method = entry
     try:
-        # Special case report
-        if namespace == "Alexa" and name == "ReportState":
-            namespace = "Alexa.ReportState"
-        class allowed(object):
-            Alexa = Alexa
-        make_class = operator.attrgetter(namespace)
-        obj = make_class(allowed)(namespace, name, handler)
-        return obj.invoke(name, request)
+        obj = cls(namespace, name, handler)
+        return obj.invoke(method, request)
 
     except Exception:
         _LOGGER.exception("Error processing Alexa directive for %s/%s", namespace, name)
         return api_error(request, error_type='INTERNAL_ERROR', error_message="An unexpected error occurred while processing your directive.")
 
+def _build_directives():
+    """Map every (namespace, name) directive to its handler class and method."""
+    directives = {}
+    for clsName, cls in vars(Alexa).items():
+        if not (isinstance(cls, type) and issubclass(cls, AlexaSmartHomeCall)):
+            continue
+        for method, func in vars(cls).items():
+            if callable(func) and method[:1].isupper():
+                directives[('Alexa.' + clsName, method)] = (cls, method)
+    # Special case report, sent as Alexa/ReportState
+    directives[('Alexa', 'ReportState')] = directives[('Alexa.ReportState', 'ReportState')]
+    return directives
+
+DIRECTIVES = _build_directives()
+
+# Conversion to Celsius for each Alexa temperature scale
+_TO_CELSIUS = {
+    'CELSIUS': lambda t: t,
+    'FAHRENHEIT': lambda t: (t - 32.0) / 1.8,
+    'KELVIN': lambda t: t - 273.15,
+}
+
 def temperature_from_object(temp_obj):
     """Get temperature from Temperature object in requested unit."""
     temp = float(temp_obj['value'])
-    if temp_obj['scale'] == 'FAHRENHEIT':
-        temp = (temp - 32.0) / 1.8
-    elif temp_obj['scale'] == 'KELVIN':
-        temp -= 273.15
-    return temp
\ No newline at end of file
+    convert = _TO_CELSIUS.get(temp_obj['scale'])
+    return convert(temp) if convert else temp
@@ -1,15 +1,115 @@
-import json, ssl, base64, math, colorsys, logging, re
-from urllib.request import urlopen, Request
+import ssl, base64, math, logging, re, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from http.client import HTTPConnection, HTTPSConnection, HTTPException
+from urllib.parse import urlsplit
 from AlexaSmartHome import *
 
+# orjson decodes the raw response bytes faster when it is bundled, json also accepts bytes
+try:
+    from orjson import loads as _loads
+except ImportError:
+    from json import loads as _loads
+
 _LOGGER = logging.getLogger(__name__)
 ENDPOINT_ADAPTERS = Registry()
 
+# Domoticz color JSON, e.g. {"b":0,"cw":0,"g":0,"m":3,"r":0,"t":255,"ww":255}
+_COLOR_RE = re.compile(r'"([rgb])"\s*:\s*(\d+)')
+
+# Which of (v, p, q, t) goes to r, g and b for each hue sector
+_HSV_SECTORS = ((0, 3, 1), (2, 0, 1), (1, 0, 3), (1, 2, 0), (3, 1, 0), (0, 1, 2))
+
+def _hsv_to_rgb(h, s, v):
+    """Same result as colorsys.hsv_to_rgb, all components in 0..1."""
+    h6 = h * 6.0
+    i = int(h6)
+    f = h6 - i
+    vals = (v, v * (1.0 - s), v * (1.0 - s * f), v * (1.0 - s * (1.0 - f)))
+    ri, gi, bi = _HSV_SECTORS[i % 6]
+    return vals[ri], vals[gi], vals[bi]
+
+def _rgb_to_hsv(r, g, b):
+    """Same result as colorsys.rgb_to_hsv, all components in 0..1."""
+    maxc = max(r, g, b)
+    rangec = maxc - min(r, g, b)
+    if rangec == 0:
+        return 0.0, 0.0, maxc
+    if r == maxc:
+        h = (g - b) / rangec
+    elif g == maxc:
+        h = 2.0 + (b - r) / rangec
+    else:
+        h = 4.0 + (r - g) / rangec
+    return (h / 6.0) % 1.0, rangec / maxc, maxc
+
+# ======================================================
+# Alexa Properties
+# ======================================================
+
+# Domoticz statuses reported as ON, besides the 'Set Level: N %' family
+_ON_STATES = frozenset(('On', 'Open'))
+
+def _powerState(d):
+    status = d.get('Status', 'Off')
+    return 'ON' if (status in _ON_STATES or status[:9] == 'Set Level') else 'OFF'
+
+def _color(d):
+    color_json = d.get('Color', '{}')
+    try:
+        c = dict(_COLOR_RE.findall(color_json))
+        r, g, b = int(c.get('r', 0)), int(c.get('g', 0)), int(c.get('b', 0))
+        h, s, v = _rgb_to_hsv(r/255.0, g/255.0, b/255.0)
+        return {'hue': h*360.0, 'saturation': s, 'brightness': v}
+    except Exception:
+        # Fallback if color parsing fails
+        return None
+
+def _celsius(value):
+    if value is None:
+        return None
+    return {'value': float(value), 'scale': 'CELSIUS'}
+
+@lru_cache(maxsize=64)
+def _levelNames(levelNames):
+    """Split and uppercase a Domoticz LevelNames string, once per distinct value."""
+    return tuple(n.upper() for n in levelNames.split('|'))
+
+@lru_cache(maxsize=64)
+def _levelValues(levelNames, levelInt):
+    """Map each reported level name, casefolded, to its Domoticz level."""
+    # Built from the same names thermostatMode reports, so a reported mode always maps back
+    return {n.casefold(): i * levelInt for i, n in enumerate(_levelNames(levelNames))}
+
+def _thermostatMode(d):
+    names = _levelNames(d.get('LevelNames', ''))
+    try:
+        step = int(d.get('LevelInt', 10))
+        if step == 0:
+            return 'AUTO'
+        return names[int(d.get('Level', 0)) // step]
+    except Exception:
+        return 'AUTO'
+
+# Alexa property name -> reader of the Domoticz device dict
+_PROPERTY_HANDLERS = {
+    'powerState': _powerState,
+    'color': _color,
+    'brightness': lambda d: int(d.get('Level', 0)),
+    'percentage': lambda d: int(d.get('Level', 0)),
+    'temperature': lambda d: _celsius(d.get('Temp')),
+    'targetSetpoint': lambda d: _celsius(d.get('SetPoint')),
+    'thermostatMode': _thermostatMode,
+    'detectionState': lambda d: 'DETECTED' if d.get('Status') == 'Open' else 'NOT_DETECTED',
+}
+
 # ======================================================
 # Base Endpoint
 # ======================================================
 
 class DomoticzEndpoint(AlexaEndpoint):
+    __slots__ = ('handler', '_device', 'idx')
+
     def __init__(self, *args):
         super().__init__(*args)
         self.handler = None
@@ -25,53 +125,12 @@ class DomoticzEndpoint(AlexaEndpoint):
 
     # ---------------- Alexa Properties ----------------
 
-    def getProperty(self, name):
-        d = self.getDevice()
+    def getProperty(self, name, device=None):
+        d = device if device is not None else self.getDevice()
         if not d:
             return None
-
-        if name == 'powerState':
-            status = d.get('Status', 'Off')
-            return 'ON' if (status in ('On', 'Open') or status.startswith('Set Level')) else 'OFF'
-
-        if name == 'color':
-            color_json = d.get('Color', '{}')
-            try:
-                c = json.loads(color_json)
-                r, g, b = c.get('r', 0), c.get('g', 0), c.get('b', 0)
-                h, s, v = colorsys.rgb_to_hsv(r/255.0, g/255.0, b/255.0)
-                return {'hue': h*360.0, 'saturation': s, 'brightness': v}
-            except Exception:
-                # Fallback if color parsing fails
-                return None
-
-        if name in ('brightness', 'percentage'):
-            return int(d.get('Level', 0))
-
-        if name == 'temperature':
-            t = d.get('Temp')
-            if t is None:
-                return None
-            return {'value': float(t), 'scale': 'CELSIUS'}
-
-        if name == 'targetSetpoint':
-            sp = d.get('SetPoint')
-            if sp is None:
-                return None
-            return {'value': float(sp), 'scale': 'CELSIUS'}
-
-        if name == 'thermostatMode':
-            names = d.get('LevelNames', '').split('|')
-            try:
-                idx = int(d.get('Level', 0) / d.get('LevelInt', 10))
-                return names[idx].upper()
-            except Exception:
-                return 'AUTO'
-
-        if name == 'detectionState':
-            return 'DETECTED' if d.get('Status') == 'Open' else 'NOT_DETECTED'
-
-        return None
+        fn = _PROPERTY_HANDLERS.get(name)
+        return fn(d) if fn else None
 
 
 # ======================================================
@@ -80,6 +139,8 @@ class DomoticzEndpoint(AlexaEndpoint):
 
 @ENDPOINT_ADAPTERS.register('SwitchLight')
 class SwitchLightEndpoint(DomoticzEndpoint):
+    __slots__ = ()
+
     def __init__(self, *args):
         super().__init__(*args)
         self.addCapability(AlexaPowerController(self))
@@ -95,7 +156,7 @@ class SwitchLightEndpoint(DomoticzEndpoint):
         self.handler.setLevel(self.idx, value)
 
     def setColor(self, h, s, b):
-        r, g, b_val = [int(x*255) for x in colorsys.hsv_to_rgb(h/360.0, s, b/100.0)]
+        r, g, b_val = [int(x*255) for x in _hsv_to_rgb(h/360.0, s, b/100.0)]
         self.handler.setColor(self.idx, r, g, b_val)
 
     def setColorTemperature(self, kelvin):
@@ -104,6 +165,8 @@ class SwitchLightEndpoint(DomoticzEndpoint):
 
 @ENDPOINT_ADAPTERS.register('Blind')
 class BlindEndpoint(DomoticzEndpoint):
+    __slots__ = ()
+
     def __init__(self, *args):
         super().__init__(*args)
         self.addCapability(AlexaPowerController(self))
@@ -121,6 +184,8 @@ class BlindEndpoint(DomoticzEndpoint):
 
 @ENDPOINT_ADAPTERS.register('TemperatureSensor')
 class TemperatureSensorEndpoint(DomoticzEndpoint):
+    __slots__ = ()
+
     def __init__(self, *args):
         super().__init__(*args)
         self.addCapability(AlexaTemperatureSensor(self))
@@ -129,6 +194,8 @@ class TemperatureSensorEndpoint(DomoticzEndpoint):
 
 @ENDPOINT_ADAPTERS.register('Thermostat')
 class ThermostatEndpoint(DomoticzEndpoint):
+    __slots__ = ()
+
     def __init__(self, *args):
         super().__init__(*args)
         self.addCapability(AlexaTemperatureSensor(self))
@@ -149,6 +216,8 @@ class ThermostatEndpoint(DomoticzEndpoint):
 
 @ENDPOINT_ADAPTERS.register('Scene')
 class SceneEndpoint(DomoticzEndpoint):
+    __slots__ = ()
+
     def __init__(self, *args):
         super().__init__(*args)
         self.addCapability(AlexaSceneController(self))
@@ -161,56 +230,343 @@ class SceneEndpoint(DomoticzEndpoint):
         self.handler.setScene(self.idx, 'Off')
 
 
+# Domoticz device Type -> (endpoint class, endpointId prefix), exact matches first
+_EP_EXACT = {
+    'Scene': (SceneEndpoint, 'Scene'),
+    'Group': (SceneEndpoint, 'Scene'),
+}
+# then the first token found in the Type, in order
+_EP_SUBSTR_TABLE = (
+    ('Temp', TemperatureSensorEndpoint, 'TemperatureSensor'),
+    ('Thermostat', ThermostatEndpoint, 'Thermostat'),
+    ('Blind', BlindEndpoint, 'Blind'),
+    ('RFY', BlindEndpoint, 'Blind'),
+)
+_EP_DEFAULT = (SwitchLightEndpoint, 'SwitchLight')
+
+def _endpointClass(devType):
+    found = _EP_EXACT.get(devType)
+    if found is None:
+        found = next(((cls, prefix) for token, cls, prefix in _EP_SUBSTR_TABLE if token in devType), _EP_DEFAULT)
+    return found
+
+
+# ======================================================
+# HTTP Connections
+# ======================================================
+
+# Domoticz serves requests with a handful of worker threads, more parallel calls only queue there
+_MAX_CONNECTIONS = 4
+_CONNECT_TIMEOUT = 2
+_READ_TIMEOUT = 5
+# Upper bound for one call, waiting for a free connection and a resend included,
+# keeps a Lambda reply inside Alexa's 8 seconds
+_REQUEST_DEADLINE = 6
+# How a kept-alive socket closed by the server fails before any response byte arrives,
+# RemoteDisconnected is a ConnectionResetError
+_STALE_ERRORS = (BrokenPipeError, ConnectionResetError)
+
+class _ConnectionPool:
+    """Keep-alive HTTP(S) connections to one Domoticz server."""
+
+    def __init__(self, url, context=None, maxsize=_MAX_CONNECTIONS,
+                 connectTimeout=_CONNECT_TIMEOUT, readTimeout=_READ_TIMEOUT, deadline=_REQUEST_DEADLINE):
+        parts = urlsplit(url)
+        self._https = parts.scheme == 'https'
+        self._host = parts.hostname
+        self._port = parts.port
+        self._context = context
+        self._maxsize = maxsize
+        self._connectTimeout = connectTimeout
+        self._readTimeout = readTimeout
+        self._deadline = deadline
+        self._idle = []
+        self._lock = threading.Lock()
+        # At most maxsize requests in flight, the others wait for a free connection
+        self._slots = threading.BoundedSemaphore(maxsize)
+
+    @staticmethod
+    def _left(deadline, limit):
+        """Seconds a socket may wait, at most limit and never past deadline."""
+        left = deadline - time.monotonic()
+        if left <= 0:
+            raise TimeoutError("Domoticz request deadline exceeded")
+        return min(left, limit)
+
+    def _connect(self, deadline):
+        timeout = self._left(deadline, self._connectTimeout)
+        if self._https:
+            conn = HTTPSConnection(self._host, self._port, timeout=timeout, context=self._context)
+        else:
+            conn = HTTPConnection(self._host, self._port, timeout=timeout)
+        conn.connect()
+        return conn
+
+    def get(self, path, headers):
+        """GET path, return (status, body bytes)."""
+        deadline = time.monotonic() + self._deadline
+        if not self._slots.acquire(timeout=self._deadline):
+            raise TimeoutError("no free Domoticz connection")
+        try:
+            return self._get(path, headers, deadline)
+        finally:
+            self._slots.release()
+
+    def _get(self, path, headers, deadline):
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        reused = conn is not None
+        if conn is None:
+            conn = self._connect(deadline)
+        while True:
+            try:
+                conn.sock.settimeout(self._left(deadline, self._readTimeout))
+                conn.request('GET', path, headers=headers)
+                r = conn.getresponse()
+                break
+            except _STALE_ERRORS:
+                conn.close()
+                # The server dropped the idle connection before answering, resend once on a fresh one
+                if not reused:
+                    raise
+                reused = False
+                conn = self._connect(deadline)
+            except BaseException:
+                # Timeouts and other failures are not resent, Domoticz may have acted on the request
+                conn.close()
+                raise
+        try:
+            # http.client already detached the socket when the server closes after this response
+            if conn.sock is not None:
+                conn.sock.settimeout(self._left(deadline, self._readTimeout))
+            body = r.read()
+        except BaseException:
+            conn.close()
+            raise
+
+        if r.will_close:
+            conn.close()
+        else:
+            with self._lock:
+                if len(self._idle) < self._maxsize:
+                    self._idle.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+        return r.status, body
+
+# Pools outlive a Domoticz instance so a warm Lambda container keeps its connections
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+def _getPool(url):
+    with _POOLS_LOCK:
+        pool = _POOLS.get(url)
+        if pool is None:
+            context = None
+            if url.startswith("https"):
+                # Domoticz often runs with a self-signed certificate, only our connections skip
+                # verification, so no CA bundle needs loading
+                context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+            pool = _POOLS[url] = _ConnectionPool(url, context)
+        return pool
+
+# Worker threads for concurrent API calls, created on first use
+_EXECUTOR = None
+
+def _getExecutor():
+    global _EXECUTOR
+    with _POOLS_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(max_workers=_MAX_CONNECTIONS, thread_name_prefix='domoticz')
+        return _EXECUTOR
+
+
 # ======================================================
 # Domoticz Handler
 # ======================================================
 
+# Seconds a fetched device state is served from cache
+_DEVICE_TTL = 30
+# Seconds a caller waits for the same fetch already running in another thread
+_FETCH_WAIT = 10
+
+# Friendly name override in the device description: "Alexa_Name: Kitchen light"
+_ALEXA_NAME_RE = re.compile(r'Alexa_Name:\s*([^\n\r]*)', re.IGNORECASE)
+
 class Domoticz:
     def __init__(self, url, username=None, password=None):
         self.url = url.rstrip('/')
         self.auth = None
         self.devices = {}
+        # Fetch times (time.monotonic) per idx, for the full list and for scenes
+        self._fetchedAt = {}
+        self._devicesFetchedAt = None
+        self._scenesFetchedAt = None
+        # (endpoint class, endpointId) per idx, kept beside the Domoticz device data
+        self._categories = {}
+        # Discovery columns (idx, endpoint class, endpointId, name, description, type, subtype)
+        # of the last full load
+        self._columns = ((), (), (), (), (), (), ())
+        # Fetches in progress, keyed by idx or 'Scene'
+        self._inflight = {}
+        self._inflightLock = threading.Lock()
         self.config = None
 
         if username:
             token = base64.b64encode(f"{username}:{password}".encode()).decode()
             self.auth = f"Basic {token}"
 
-        if self.url.startswith("https"):
-            ctx = ssl.create_default_context()
-            ctx.check_hostname = False
-            ctx.verify_mode = ssl.CERT_NONE
-            ssl._create_default_https_context = lambda: ctx
+        # Request path prefix and headers are the same for every call
+        self._jsonPrefix = urlsplit(self.url).path + "/json.htm?"
+        self._headers = {'Content-Type': 'application/json'}
+        if self.auth:
+            self._headers['Authorization'] = self.auth
+        self._pool = _getPool(self.url)
 
     def configure(self, config):
         self.config = config
 
     # ---------------- API ----------------
 
-    def api(self, query):
-        url = f"{self.url}/json.htm?{query}"
-        headers = {'Content-Type': 'application/json'}
-        if self.auth:
-            headers['Authorization'] = self.auth
+    def _fetch(self, query):
+        """Return the raw response body of query, or None after logging the error."""
+        try:
+            status, body = self._pool.get(self._jsonPrefix + query, self._headers)
+            if status != 200:
+                raise HTTPException(f"HTTP status {status}")
+            return body
+        except Exception as e:
+            _LOGGER.error(f"Domoticz API error: {e}")
+            return None
 
+    def api(self, query):
+        body = self._fetch(query)
+        if body is None:
+            return {}
         try:
-            req = Request(url, headers=headers)
-            with urlopen(req, timeout=5) as r:
-                return json.loads(r.read().decode())
+            return _loads(body)
         except Exception as e:
             _LOGGER.error(f"Domoticz API error: {e}")
             return {}
 
+    def _command(self, query):
+        """Send a command whose response is not needed, skipping the JSON decode."""
+        self._fetch(query)
+
+    def gather(self, *calls):
+        """Run independent API calls concurrently, return their results in order."""
+        if len(calls) < 2:
+            return [call() for call in calls]
+        futures = [_getExecutor().submit(call) for call in calls]
+        return [f.result() for f in futures]
+
+    # ---------------- Cache ----------------
+
+    @staticmethod
+    def _isFresh(fetchedAt):
+        return fetchedAt is not None and time.monotonic() - fetchedAt < _DEVICE_TTL
+
+    def _getCached(self, idx):
+        """Return the cached device for idx, or None if missing or expired."""
+        if self._isFresh(self._fetchedAt.get(idx)):
+            return self.devices.get(idx)
+        return None
+
+    def _storeDevices(self, devices):
+        now = time.monotonic()
+        for d in devices:
+            idx = str(d['idx'])
+            # Categorize once, when the device enters the cache
+            cls, prefix = _endpointClass(d.get('Type', ''))
+            self._categories[idx] = (cls, prefix + '-' + idx)
+            self.devices[idx] = d
+            self._fetchedAt[idx] = now
+        return now
+
+    def _fetchOnce(self, key, fetch):
+        """Run fetch, or wait for the one another thread is already running for key."""
+        with self._inflightLock:
+            event = self._inflight.get(key)
+            leader = event is None
+            if leader:
+                event = self._inflight[key] = threading.Event()
+        if not leader:
+            event.wait(_FETCH_WAIT)
+            return
+        try:
+            fetch()
+        finally:
+            with self._inflightLock:
+                del self._inflight[key]
+            event.set()
+
+    @staticmethod
+    def _succeeded(res):
+        """api() returns {} on any error, Domoticz leaves out an empty result but still says OK."""
+        return 'result' in res or res.get('status') == 'OK'
+
+    def _fetchScenes(self):
+        res = self.api("type=command&param=getscenes")
+        if self._succeeded(res):
+            self._scenesFetchedAt = self._storeDevices(res.get('result', []))
+
+    def _fetchDevice(self, idx):
+        res = self.api(f"type=command&param=getdevices&rid={idx}")
+        self._storeDevices(res.get('result', [])[:1])
+
+    def _invalidate(self, idx):
+        """Mark idx stale after a command, it stays listed for discovery."""
+        self._fetchedAt.pop(str(idx), None)
+
     # ---------------- Load ----------------
 
     def loadDevices(self):
-        res = self.api("type=command&param=getdevices&filter=all&used=true")
-        self.devices = {str(d['idx']): d for d in res.get('result', [])}
+        withScenes = self.config and getattr(self.config, 'includeScenesGroups', False)
+        # Devices and scenes are independent lists, fetch them concurrently
+        calls = [lambda: self.api("type=command&param=getdevices&filter=all&used=true")]
+        if withScenes:
+            calls.append(lambda: self.api("type=command&param=getscenes"))
+        results = self.gather(*calls)
+        if not self._succeeded(results[0]):
+            # Keep serving the previous load, the next discovery tries again
+            return
+        scenesOk = withScenes and self._succeeded(results[1])
+
+        # Scenes that could not be refetched stay listed from the previous load
+        keep = {}
+        if withScenes and not scenesOk:
+            keep = {idx: d for idx, d in self.devices.items() if self._categories[idx][0] is SceneEndpoint}
+        fetchedAt = self._fetchedAt
+        categories = self._categories
 
-        if self.config and getattr(self.config, 'includeScenesGroups', False):
-            res = self.api("type=command&param=getscenes")
-            for d in res.get('result', []):
-                self.devices[str(d['idx'])] = d
+        self.devices = {}
+        self._fetchedAt = {}
+        self._categories = {}
+        self._devicesFetchedAt = self._storeDevices(results[0].get('result', []))
+        if scenesOk:
+            self._scenesFetchedAt = self._storeDevices(results[1].get('result', []))
+        for idx, d in keep.items():
+            if idx not in self.devices:
+                self.devices[idx] = d
+                self._categories[idx] = categories[idx]
+            if idx in fetchedAt:
+                self._fetchedAt.setdefault(idx, fetchedAt[idx])
+
+        devices = self.devices
+        idxs = tuple(devices)
+        categories = [self._categories[idx] for idx in idxs]
+        self._columns = (
+            idxs,
+            tuple(cls for cls, _ in categories),
+            tuple(endpointId for _, endpointId in categories),
+            tuple(devices[idx]['Name'] if 'Name' in devices[idx] else f"Device {idx}" for idx in idxs),
+            tuple(devices[idx].get('Description', '') for idx in idxs),
+            tuple(devices[idx].get('Type', '') for idx in idxs),
+            tuple(devices[idx].get('SubType', '') for idx in idxs),
+        )
 
     # ---------------- Alexa ----------------
 
@@ -220,13 +576,14 @@ class Domoticz:
         (TurnOn, TurnOff, SetBrightness, etc.)
         """
         endpointId = request['endpoint']['endpointId']
-        prefix, idx = endpointId.split("-", 1)
+        prefix, _, idx = endpointId.partition("-")
 
-        if prefix not in ENDPOINT_ADAPTERS:
-            raise Exception(f"Unknown endpoint type {prefix}")
+        adapter = ENDPOINT_ADAPTERS.get(prefix)
+        if adapter is None or not idx:
+            raise UnknownEndpointError(endpointId)
 
         # Create endpoint instance dynamically
-        endpoint = ENDPOINT_ADAPTERS[prefix](
+        endpoint = adapter(
             endpointId,
             request['endpoint'].get('friendlyName', ''),
             '',
@@ -237,7 +594,7 @@ class Domoticz:
         endpoint.setHandler(self)
 
         # Attach cached device
-        device = self.devices.get(idx)
+        device = self._getCached(idx)
         if device:
             endpoint._device = device
 
@@ -248,103 +605,92 @@ class Domoticz:
         idx = parts[-1]
         
         # Return cached if available
-        if idx in self.devices:
-            return self.devices[idx]
+        device = self._getCached(idx)
+        if device is not None:
+            return device
 
-        # Not in cache? Fetch it from Domoticz
+        # Not in cache or expired? Fetch it from Domoticz
         prefix = parts[0]
         if prefix == 'Scene':
-            res = self.api("type=command&param=getscenes")
-            for d in res.get('result', []):
-                self.devices[str(d['idx'])] = d
+            # Unknown scene idx: the scene list is refetched at most once per TTL
+            if idx not in self.devices and self._isFresh(self._scenesFetchedAt):
+                return None
+            # Concurrent scene lookups share a single getscenes call
+            self._fetchOnce('Scene', self._fetchScenes)
         else:
-            res = self.api(f"type=command&param=getdevices&rid={idx}")
-            if res.get('result'):
-                self.devices[idx] = res['result'][0]
+            self._fetchOnce(idx, lambda: self._fetchDevice(idx))
         
-        return self.devices.get(idx)
+        return self._getCached(idx)
+
+    def _makeEndpoint(self, idx, cls, endpointId, name, desc, devType, subType):
+        """Build the fully initialized endpoint for one discovered device."""
+        if desc and 'alexa_name' in desc.lower():
+            match = _ALEXA_NAME_RE.search(desc)
+            if match:
+                name = match.group(1).strip()
+
+        ep = cls(endpointId, name, devType, "Domoticz")
+        if cls is SwitchLightEndpoint:
+            # Add color capabilities if device supports it
+            if 'RGB' in subType or 'Color' in devType:
+                ep.addCapability(AlexaColorController(ep))
+                ep.addCapability(AlexaColorTemperatureController(ep))
+            ep.addDisplayCategories("LIGHT")
+
+        ep.idx = idx
+        ep.handler = self
+        return ep
 
     def getEndpoints(self):
-        self.loadDevices()
-        eps = []
-
-        for idx, d in self.devices.items():
-            name = d.get('Name', f"Device {idx}")
-            desc = d.get('Description', '')
-            if desc:
-                match = re.search(r'Alexa_Name:\s*([^\n\r]*)', desc, re.IGNORECASE)
-                if match:
-                    name = match.group(1).strip()
-            devType = d.get('Type', '')
-
-            if devType in ('Scene', 'Group'):
-                ep = SceneEndpoint(f"Scene-{idx}", name, devType, "Domoticz")
-
-            elif 'Temp' in devType:
-                ep = TemperatureSensorEndpoint(
-                    f"TemperatureSensor-{idx}", name, devType, "Domoticz"
-                )
-
-            elif 'Thermostat' in devType:
-                ep = ThermostatEndpoint(
-                    f"Thermostat-{idx}", name, devType, "Domoticz"
-                )
-
-            elif 'Blind' in devType or 'RFY' in devType:
-                ep = BlindEndpoint(
-                    f"Blind-{idx}", name, devType, "Domoticz"
-                )
-
-            else:
-                ep = SwitchLightEndpoint(
-                    f"SwitchLight-{idx}", name, devType, "Domoticz"
-                )
-                # Add color capabilities if device supports it
-                subType = d.get('SubType', '')
-                if 'RGB' in subType or 'Color' in devType:
-                    ep.addCapability(AlexaColorController(ep))
-                    ep.addCapability(AlexaColorTemperatureController(ep))
-                ep.addDisplayCategories("LIGHT")
-
-            ep.idx = idx
-            ep.setHandler(self)
-            eps.append(ep)
+        if not self._isFresh(self._devicesFetchedAt):
+            self.loadDevices()
+        make = self._makeEndpoint
+        eps = [make(*row) for row in zip(*self._columns)]
 
         _LOGGER.warning(f"Alexa Discovery endpoints: {len(eps)}")
         return eps
 
     # ---------------- Actions ----------------
 
+    # Command queries, filled with % at call time
+    _SWITCH_QUERY = 'type=command&param=switchlight&idx=%s&switchcmd=%s'
+    _LEVEL_QUERY = 'type=command&param=switchlight&idx=%s&switchcmd=Set%%20Level&level=%s'
+    _COLOR_QUERY = 'type=command&param=setcolbrightnessvalue&idx=%s&r=%s&g=%s&b=%s&brightness=100'
+    _COLORTEMP_QUERY = 'type=command&param=setcolbrightnessvalue&idx=%s&color={"m":3,"t":%s}'
+    _SETPOINT_QUERY = 'type=command&param=setsetpoint&idx=%s&setpoint=%s'
+    _SCENE_QUERY = 'type=command&param=switchscene&idx=%s&switchcmd=%s'
+
     def setSwitch(self, idx, cmd):
-        self.api(f"type=command&param=switchlight&idx={idx}&switchcmd={cmd}")
+        self._command(self._SWITCH_QUERY % (idx, cmd))
+        self._invalidate(idx)
 
     def setLevel(self, idx, level):
-        self.api(
-            f"type=command&param=switchlight&idx={idx}&switchcmd=Set%20Level&level={level}"
-        )
+        self._command(self._LEVEL_QUERY % (idx, level))
+        self._invalidate(idx)
 
     def setColor(self, idx, r, g, b):
-        self.api(f"type=command&param=setcolbrightnessvalue&idx={idx}&r={r}&g={g}&b={b}&brightness=100")
+        self._command(self._COLOR_QUERY % (idx, r, g, b))
+        self._invalidate(idx)
 
     def setColorTemperature(self, idx, kelvin):
         # Map Kelvin (2000-6500) to Domoticz level (0-100)
-        level = int((kelvin - 2000) / (6500 - 2000) * 100)
-        level = max(0, min(100, level))
-        self.api(f"type=command&param=setcolbrightnessvalue&idx={idx}&color={{\"m\":3,\"t\":{level}}}")
+        level = max(0, min(100, (int(kelvin) - 2000) * 100 // 4500))
+        self._command(self._COLORTEMP_QUERY % (idx, level))
+        self._invalidate(idx)
 
     def setSetpoint(self, idx, value):
-        self.api(
-            f"type=command&param=setsetpoint&idx={idx}&setpoint={value}"
-        )
+        self._command(self._SETPOINT_QUERY % (idx, value))
+        self._invalidate(idx)
 
     def setLevelByName(self, idx, name):
-        d = self.devices.get(str(idx))
-        names = d.get('LevelNames', '').split('|')
-        if name.upper() in [n.upper() for n in names]:
-            lvl = names.index(name.upper()) * d.get('LevelInt', 10)
-            self.setLevel(idx, lvl)
+        idx = str(idx)
+        d = self.devices.get(idx) or self.getDevice(idx)
+        if not d:
+            return
+        level = _levelValues(d.get('LevelNames', ''), d.get('LevelInt', 10)).get(name.casefold())
+        if level is not None:
+            self.setLevel(idx, level)
 
     def setScene(self, idx, cmd):
-        self.api(
-            f"type=command&param=switchscene&idx={idx}&switchcmd={cmd}"
-        )
+        self._command(self._SCENE_QUERY % (idx, cmd))
+        self._invalidate(idx)